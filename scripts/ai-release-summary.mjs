@@ -2,6 +2,9 @@
 // Optional AI-assisted summarizer for release-log entries.
 // Usage:
 //  node scripts/ai-release-summary.mjs --apply [--top 1] [--model gpt-4o-mini]
+//  node scripts/ai-release-summary.mjs --versions 1.3.10,1.3.11 --json
+//    (prints { "<version>": { descriptionPublic, description, quality } } to stdout
+//     without writing; used by the local watcher's summary queue)
 // Env:
 //  OPENAI_API_KEY=... (optional). If missing, uses deterministic templates.
 //  AI_LANGS=tr,de,en (default: tr,de,en)
@@ -24,10 +27,15 @@ const APPLY = argv.get('apply') === '1' || argv.get('apply') === '';
 const TOP = parseInt(argv.get('top')||'1',10) || 1;
 const MODEL = argv.get('model') || 'gpt-4o-mini';
 const LANGS = (process.env.AI_LANGS || 'tr,de,en').split(',').map(s=>s.trim()).filter(Boolean);
+const VERSIONS = (argv.get('versions') || '').split(',').map(s=>s.trim()).filter(Boolean);
+const JSON_OUT = argv.has('json');
 
 const path = 'modules/ReleaseManagement/release-log.json';
 const log = readJSON(path, []);
-if (!Array.isArray(log) || !log.length) process.exit(0);
+if (!Array.isArray(log) || !log.length) {
+  if (JSON_OUT) console.log('{}');
+  process.exit(0);
+}
 
 const key = process.env.OPENAI_API_KEY || '';
 const BASE = (process.env.OPENAI_BASE_URL || 'https://api.openai.com/v1').replace(/\/$/,'');
@@ -142,12 +150,17 @@ let allowed = Math.max(0, MAX_PER_DAY - usage.count);
 let requestedTop = Math.min(TOP, log.length);
 if (key && allowed <= 0) {
   console.error('ai-release-summary: daily limit reached; skipping');
+  if (JSON_OUT) console.log('{}');
   process.exit(0);
 }
+if (VERSIONS.length) requestedTop = VERSIONS.length;
 if (key && requestedTop > allowed) requestedTop = allowed;
 
-const targets = log.slice(0, requestedTop);
+const targets = VERSIONS.length
+  ? log.filter(e => e && VERSIONS.includes(e.version)).slice(0, requestedTop)
+  : log.slice(0, requestedTop);
 let changed = false;
+const results = {};
 for (const e of targets) {
   if (e && (!e.description || e.quality === 'auto')) {
     const pub = await aiSummary(e);
@@ -156,11 +169,13 @@ for (const e of targets) {
     e.description = e.description || {};
     for (const lang of LANGS) if (!e.description[lang]) e.description[lang] = pub[lang];
     e.quality = 'ai';
+    results[e.version] = { descriptionPublic: e.descriptionPublic, description: e.description, quality: e.quality };
     changed = true;
     if (key) { usage.count += 1; }
   }
 }
 
-if (APPLY && changed) writeJSON(path, log);
+if (APPLY && changed && !JSON_OUT) writeJSON(path, log);
 if (key && changed) saveUsage(usage);
-console.log(`ai-release-summary: ${changed? 'updated' : 'no-change'}`);
+if (JSON_OUT) console.log(JSON.stringify(results));
+else console.log(`ai-release-summary: ${changed? 'updated' : 'no-change'}`);
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Offline stand-in for ai-release-summary.mjs (no network, no Node required)
+Speaks the watcher's summary protocol: takes `--versions v1,v2 --json` and
+prints {"<version>": {"descriptionPublic": {...}, "quality": "ai"}} on stdout.
+
+Use with the watcher:
+  AI_SUMMARIZE=1 AI_SUMMARY_CMD="python3 scripts/ai_summary_stub.py" \
+    python3 scripts/local_watch_auto_release.py
+
+Env knobs (used by tests/test_summary_queue.py):
+  AI_STUB_SLEEP   seconds to sleep before answering (timeout path)
+  AI_STUB_FAILS   fail this many calls before answering (retry path)
+  AI_STUB_STATE   file counting calls, needed with AI_STUB_FAILS
+  AI_STUB_EXTRA   also emit a forbidden field ("version") to check filtering
+"""
+import argparse, json, os, sys, time
+from pathlib import Path
+
+def answer(versions):
+    delay = float(os.environ.get('AI_STUB_SLEEP', '0') or 0)
+    if delay:
+        time.sleep(delay)
+    state = os.environ.get('AI_STUB_STATE')
+    if state:
+        path = Path(state)
+        calls = int(path.read_text() or 0) if path.exists() else 0
+        path.write_text(str(calls + 1))
+        if calls < int(os.environ.get('AI_STUB_FAILS', '0') or 0):
+            sys.exit(1)
+    out = {}
+    for v in versions:
+        out[v] = {'descriptionPublic': {'en': f'Stub summary for {v}.'}, 'quality': 'ai'}
+        if os.environ.get('AI_STUB_EXTRA'):
+            out[v]['version'] = 'overwritten'
+    print(json.dumps(out))
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--versions', default='')
+    ap.add_argument('--json', action='store_true')
+    args = ap.parse_args()
+    answer([v for v in args.versions.split(',') if v])
+
+if __name__ == '__main__':
+    main()
@@ -157,7 +157,7 @@ const entry = {
   risk,
   quality: 'auto',
   state: 'draft',
-  sources: ['ci'],
+  sources: [process.env.GITHUB_ACTIONS ? 'ci' : 'pre-commit'],
   _commit: headSha,
   _branch: branch,
   _range: range,
@@ -1,5 +1,8 @@
 #!/usr/bin/env python3
 import json, subprocess, datetime, os, sys, re
+from release_rollups import update_rollups
+from release_archive import apply_retention
+from release_lock import ReleaseLock, LockTimeout, read_lease, write_lease, recorded_by_other, release_paths
 
 def sh(cmd):
     try:
@@ -53,6 +56,13 @@ pkg_path = 'package.json'
 meta_path = 'system.meta.json'
 rel_path = 'modules/ReleaseManagement/release-log.json'
 
+# Serialize with the local watcher; released when the hook process exits
+try:
+    lock = ReleaseLock().acquire()
+except LockTimeout as e:
+    print(f'[pre-commit] {e}; skipping release bump')
+    sys.exit(0)
+
 pkg = load_json(pkg_path, {})
 rel = load_json(rel_path, []) or []
 meta = load_json(meta_path, {}) or {}
@@ -67,6 +77,16 @@ nextv = bump_patch(prev)
 
 # Gather a basic summary from staged changes
 files = [f for f in sh('git diff --cached --name-only').splitlines() if f]
+
+# Absorb changes the watcher already released (see release_lock.py)
+effective = release_paths(files)
+absorbed = recorded_by_other(read_lease(), 'pre-commit', prev, effective)
+if effective and absorbed == set(effective):
+    print(f'[pre-commit] changes already recorded by the watcher in {prev}; no new bump')
+    sys.exit(0)
+if absorbed:
+    files = [f for f in files if f not in absorbed]
+    effective = [f for f in effective if f not in absorbed]
 mods = sorted({ (f.split('modules/',1)[-1].split('/')[0]) for f in files if 'modules/' in f })
 
 def classify(path: str) -> str:
@@ -229,13 +249,14 @@ entry = {
     'quality': 'auto',
     'state': 'draft',
     'sources': ['pre-commit'],
-    '_commit': 'HEAD'
+    '_commit': sh('git rev-parse HEAD') or 'HEAD'
 }
 
 # Prepend new entry if differs
 if not rel or rel[0].get('version') != nextv:
     rel.insert(0, entry)
-    write_json(rel_path, rel)
+    update_rollups(rel)
+    write_json(rel_path, apply_retention(rel))
 
 pkg['version'] = nextv
 write_json(pkg_path, pkg)
@@ -252,4 +273,5 @@ for path in glob.glob('modules/**/module.manifest.json', recursive=True):
         m['version'] = nextv
         write_json(path, m)
 
+write_lease('pre-commit', nextv, effective)
 print(f'Local auto-release bumped to {nextv}')
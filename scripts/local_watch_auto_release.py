@@ -5,6 +5,11 @@ Scans the workspace for file changes at an interval and automatically:
  - bumps patch version in package.json + system.meta.json + module manifests
  - prepends a new multi-language entry into modules/ReleaseManagement/release-log.json
  - records a simple state snapshot to avoid re-triggering on its own writes
+ - folds the new entry into metrics/release-rollups.json (see release_rollups.py)
+ - patches weighted risk/impact in afterwards from line-level churn (see release_risk.py)
+ - with AI_SUMMARIZE=1, queues AI summaries on a worker (coalesced, timeout + retry)
+ - rolls entries beyond the retention policy into monthly archives (see release_archive.py)
+ - shares a lock + lease with the pre-commit hook so one change yields one release (see release_lock.py)
 
 Run:  python3 scripts/local_watch_auto_release.py --interval 5
 Stop: Ctrl+C
@@ -13,9 +18,14 @@ Notes:
  - Ignores common build/output/config folders to reduce noise.
  - Description lists up to 50 changed files. You can edit the entry later if needed.
 """
-import argparse, json, os, sys, time, hashlib, datetime, fnmatch
+import argparse, json, os, sys, time, hashlib, datetime, fnmatch, threading, subprocess, shlex
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import re
+from release_rollups import update_rollups, patch_rollups
+from release_risk import collect_churn, weighted_categories, score_risk
+from release_archive import apply_retention
+from release_lock import ReleaseLock, LockTimeout, read_lease, write_lease, recorded_by_other, release_paths, git_head
 
 ROOT = Path(__file__).resolve().parents[1]
 PKG = ROOT / 'package.json'
@@ -23,8 +33,14 @@ META = ROOT / 'system.meta.json'
 REL = ROOT / 'modules' / 'ReleaseManagement' / 'release-log.json'
 STATE = ROOT / '.local_release_state.json'
 
+ENRICH = ThreadPoolExecutor(max_workers=1, thread_name_prefix='risk-enrich')
+# path -> line hashes at its last release; only touched by the single ENRICH worker
+BASELINE = {}
+# AI summary job queue; started by main() when AI_SUMMARIZE is set
+SUMMARY = None
+
 IGNORE_DIRS = {'.git', '.githooks', 'node_modules', 'dist', 'release-pack', 'metrics', '.github', '.vscode', '.idea', '__pycache__'}
-IGNORE_GLOBS = ['*.log', '*.tmp', '*.swp', '.DS_Store']
+IGNORE_GLOBS = ['*.log', '*.tmp', '*.swp', '*.bak', '.DS_Store']
 
 def should_skip(p: Path) -> bool:
     for part in p.parts:
@@ -36,12 +52,16 @@ def should_skip(p: Path) -> bool:
     # avoid self-trigger loops
     if str(p).endswith('release-log.json'):
         return True
+    if 'ReleaseManagement' in p.parts and ('archive' in p.parts or 'archive.bak' in p.parts):
+        return True
     if p.name in {'package.json', 'system.meta.json'}:
         return True
     if p.name == 'module.manifest.json':
         return True
     if p.name == '.local_release_state.json':
         return True
+    if p.name in {'.ai_usage.json', '.release.lock', '.release_lease.json', '.release_lease.tmp'}:
+        return True
     return False
 
 def snapshot() -> dict:
@@ -106,71 +126,75 @@ def in_freeze() -> bool:
     return False
 
 def _filter_changes(changes):
-    def filt(arr):
-        out = []
-        for x in arr:
-            if x.endswith('.local_release_state.json'): continue
-            if x.endswith('release-log.json'): continue
-            if x.endswith('package.json'): continue
-            if x.endswith('system.meta.json'): continue
-            if x.endswith('module.manifest.json'): continue
-            out.append(x)
-        return out
     return {
-        'added': filt(changes.get('added', [])),
-        'modified': filt(changes.get('modified', [])),
-        'removed': filt(changes.get('removed', []))
+        'added': release_paths(changes.get('added', [])),
+        'modified': release_paths(changes.get('modified', [])),
+        'removed': release_paths(changes.get('removed', []))
     }
 
-def apply_release(changes):
-    changes = _filter_changes(changes)
-    if os.environ.get('RELEASE_EXCEPTION','').lower() not in ('1','true','yes'):
-        if in_freeze():
-            print('[local-watch] in freeze window, skipping release bump (set RELEASE_EXCEPTION=true to override)')
-            return
-    pkg = load_json(PKG, {}) or {}
-    rel = load_json(REL, []) or []
-    meta = load_json(META, {}) or {}
-    prev = pkg.get('version') or (rel and rel[0].get('version')) or '0.0.0'
-    nextv = bump_patch(prev)
-
+def classify(path: str) -> str:
+    p = path
+    if p.startswith('modules/core.footer') or 'core.footer' in p:
+        return 'ui_footer'
+    if p.startswith('modules/core.header') or 'core.header' in p:
+        return 'ui_header'
+    if p.startswith('modules/core.sidebar') or 'core.sidebar' in p:
+        return 'ui_sidebar'
+    if p.startswith('modules/ReleaseManagement'):
+        return 'release_mgmt'
+    if p.startswith('modules/core.state'):
+        return 'state'
+    if p.startswith('modules/core.moduleLoader'):
+        return 'loader'
+    if p.startswith('locales/'):
+        return 'i18n'
+    if p.startswith('scripts/'):
+        return 'automation'
+    if p.startswith('src/styles/') or p == 'tailwind.config.js':
+        return 'styles'
+    if p == 'sw.js':
+        return 'service_worker'
+    if p == 'index.html':
+        return 'html_csp'
+    if p in ('app.config.json', 'system.meta.json'):
+        return 'config'
+    if p.startswith('tests/'):
+        return 'tests'
+    if p.lower().endswith(('.md',)):
+        return 'docs'
+    return 'other'
+
+def compute_impact(cats):
+    if 'html_csp' in cats or 'service_worker' in cats:
+        return 'security'
+    if 'release_mgmt' in cats or 'loader' in cats or 'state' in cats:
+        return 'feature'
+    if 'i18n' in cats or 'styles' in cats or 'ui_footer' in cats or 'ui_header' in cats or 'ui_sidebar' in cats:
+        return 'ux'
+    if 'automation' in cats:
+        return 'chore'
+    if 'tests' in cats:
+        return 'quality'
+    return 'chore'
+
+def compute_risk(counts, cats):
+    total = (counts.get('added',0)+counts.get('modified',0)+counts.get('removed',0))
+    if 'html_csp' in cats or total > 20:
+        return 'high'
+    if 'loader' in cats or 'state' in cats or total > 8:
+        return 'medium'
+    return 'low'
+
+def build_entry(changes, nextv: str, when=None, author='Local', source='watcher', commit='HEAD') -> dict:
+    """Classify changes and render the multi-language release entry (no I/O).
+
+    `when` is an aware datetime for entries not created now (e.g. git backfill).
+    """
     files_list = []
     for k in ('added','modified','removed'):
         files_list += [f"{k}: {x}" for x in changes.get(k, [])]
 
     # Build friendly, multi-language description instead of raw file list
-    def classify(path: str) -> str:
-        p = path
-        if p.startswith('modules/core.footer') or 'core.footer' in p:
-            return 'ui_footer'
-        if p.startswith('modules/core.header') or 'core.header' in p:
-            return 'ui_header'
-        if p.startswith('modules/core.sidebar') or 'core.sidebar' in p:
-            return 'ui_sidebar'
-        if p.startswith('modules/ReleaseManagement'):
-            return 'release_mgmt'
-        if p.startswith('modules/core.state'):
-            return 'state'
-        if p.startswith('modules/core.moduleLoader'):
-            return 'loader'
-        if p.startswith('locales/'):
-            return 'i18n'
-        if p.startswith('scripts/'):
-            return 'automation'
-        if p.startswith('src/styles/') or p == 'tailwind.config.js':
-            return 'styles'
-        if p == 'sw.js':
-            return 'service_worker'
-        if p == 'index.html':
-            return 'html_csp'
-        if p in ('app.config.json', 'system.meta.json'):
-            return 'config'
-        if p.startswith('tests/'):
-            return 'tests'
-        if p.lower().endswith(('.md',)):
-            return 'docs'
-        return 'other'
-
     cats = {}
     for k in ('added','modified','removed'):
         for x in changes.get(k, []):
@@ -353,27 +377,6 @@ def apply_release(changes):
             lines.append(f"Notable files: {notable}.")
         return ' '.join([x for x in lines if x]).strip()
 
-    def compute_impact(cats):
-        if 'html_csp' in cats or 'service_worker' in cats:
-            return 'security'
-        if 'release_mgmt' in cats or 'loader' in cats or 'state' in cats:
-            return 'feature'
-        if 'i18n' in cats or 'styles' in cats or 'ui_footer' in cats or 'ui_header' in cats or 'ui_sidebar' in cats:
-            return 'ux'
-        if 'automation' in cats:
-            return 'chore'
-        if 'tests' in cats:
-            return 'quality'
-        return 'chore'
-
-    def compute_risk(counts, cats):
-        total = (counts.get('added',0)+counts.get('modified',0)+counts.get('removed',0))
-        if 'html_csp' in cats or total > 20:
-            return 'high'
-        if 'loader' in cats or 'state' in cats or total > 8:
-            return 'medium'
-        return 'low'
-
     def build_public(lang: str) -> str:
         # Public note: no file names, no internal jargon
         if lang == 'tr':
@@ -418,13 +421,20 @@ def apply_release(changes):
             if parts:
                 mods.add(parts[0])
 
-    entry = {
+    if when is None:
+        date_s = datetime.date.today().isoformat()
+        time_s = datetime.datetime.now().strftime('%H:%M')
+        datetime_s = datetime.datetime.utcnow().isoformat()+'Z'
+    else:
+        date_s, time_s, datetime_s = when.date().isoformat(), when.strftime('%H:%M'), when.isoformat()
+
+    return {
         'version': nextv,
-        'date': datetime.date.today().isoformat(),
-        'time': datetime.datetime.now().strftime('%H:%M'),
-        'datetime': datetime.datetime.utcnow().isoformat()+'Z',
+        'date': date_s,
+        'time': time_s,
+        'datetime': datetime_s,
         'status': 'Stable',
-        'author': 'Local',
+        'author': author,
         'description': {
             'en': summary_en,
             'de': summary_de,
@@ -443,18 +453,19 @@ def apply_release(changes):
         'risk': risk,
         'quality': 'auto',
         'state': 'draft',
-        'sources': ['watcher'],
-        '_commit': 'HEAD',
+        'sources': [source],
+        '_commit': commit,
         '_files': files_list[:50]
     }
 
-    rel.insert(0, entry)
-    write_json(REL, rel)
-
-    pkg['version'] = nextv
+def sync_versions(version: str):
+    """Write the version to package.json, system.meta.json and the module manifests."""
+    pkg = load_json(PKG, {}) or {}
+    pkg['version'] = version
     write_json(PKG, pkg)
 
-    meta['version'] = nextv
+    meta = load_json(META, {}) or {}
+    meta['version'] = version
     meta['buildDate'] = datetime.datetime.utcnow().isoformat()+'Z'
     write_json(META, meta)
 
@@ -462,16 +473,188 @@ def apply_release(changes):
     for p in ROOT.glob('modules/**/module.manifest.json'):
         m = load_json(p, {}) or {}
         if 'version' in m:
-            m['version'] = nextv
+            m['version'] = version
             write_json(p, m)
 
-    print(f"[local-watch] release bumped to {nextv}")
-    # Optional AI enhancement of summaries
-    if os.environ.get('AI_SUMMARIZE','').lower() in ('1','true','yes'):
+def _write_release(changes) -> str:
+    pkg = load_json(PKG, {}) or {}
+    rel = load_json(REL, []) or []
+    prev = pkg.get('version') or (rel and rel[0].get('version')) or '0.0.0'
+    nextv = bump_patch(prev)
+
+    entry = build_entry(changes, nextv, commit=git_head())
+    rel.insert(0, entry)
+    update_rollups(rel)
+    write_json(REL, apply_retention(rel))
+    sync_versions(nextv)
+    return nextv
+
+def patch_entry(version: str, fields: dict, only_if=None) -> bool:
+    """Update fields of an existing entry (by version) and keep rollups in step."""
+    # Same lock as the pre-commit hook, so late patches never race a bump
+    with ReleaseLock():
+        rel = load_json(REL, []) or []
+        for e in rel:
+            if isinstance(e, dict) and e.get('version') == version:
+                if only_if is not None and not only_if(e):
+                    return False
+                if all(e.get(k) == v for k, v in fields.items()):
+                    return False  # nothing new: skip the full-log rewrite
+                before = dict(e)
+                e.update(fields)
+                write_json(REL, rel)
+                patch_rollups(before, e)
+                return True
+    return False
+
+def risk_fields(churn: dict) -> dict:
+    """Entry fields from the weighted risk model for a collect_churn()/summarize_churn() result."""
+    cats = weighted_categories(churn['perFile'], classify)
+    risk, score = score_risk(churn, cats)
+    return {
+        'impact': compute_impact(cats),
+        'risk': risk,
+        'riskScore': score,
+        'churn': {k: churn[k] for k in ('added', 'deleted', 'files', 'binary')}
+    }
+
+def enrich_risk(version: str, changes):
+    """Worker: line-level churn -> weighted risk/impact, patched into the entry.
+
+    Every entry gets riskScore/churn; patch_entry() skips the rewrite when
+    nothing differs.
+    """
+    try:
+        patch_entry(version, risk_fields(collect_churn(changes, ROOT, baseline=BASELINE)))
+    except Exception as e:
+        print(f"[local-watch] risk enrichment failed for {version}: {e}")
+
+# Entry fields a summary command may set; anything else it prints is ignored
+SUMMARY_FIELDS = ('description', 'descriptionPublic', 'quality')
+
+class SummaryQueue:
+    """Background AI summary jobs for release entries.
+
+    Versions requested while a job is running (or within the coalesce window)
+    are folded into a single command run. The command receives
+    `--versions v1,v2 --json` and must print {"<version>": {fields...}} on
+    stdout; only SUMMARY_FIELDS are patched into the matching entries, and only
+    while they are still auto-generated. Set AI_SUMMARY_CMD to
+    scripts/ai_summary_stub.py to test offline.
+    """
+
+    def __init__(self, cmd, timeout=60, retries=2, coalesce=2.0, backoff=1.0):
+        self.cmd = list(cmd)
+        self.timeout = timeout
+        self.retries = retries
+        self.coalesce = coalesce
+        self.backoff = backoff
+        self._pending = []
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._loop, name='ai-summary', daemon=True)
+        self._thread.start()
+
+    def request(self, version: str):
+        with self._cond:
+            if version not in self._pending:
+                self._pending.append(version)
+            self._cond.notify()
+
+    def stop(self, wait: float = 0):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        if wait:
+            self._thread.join(wait)
+
+    def _take(self):
+        with self._cond:
+            while not self._pending and not self._stopped:
+                self._cond.wait()
+            if self._stopped:
+                return []
+            # let back-to-back bumps pile up into one run; request() notifies,
+            # so wait against a fixed deadline rather than a single wait()
+            deadline = time.monotonic() + self.coalesce
+            while not self._stopped:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch, self._pending = self._pending, []
+            return batch
+
+    def _run(self, versions):
+        cmd = self.cmd + ['--versions', ','.join(versions), '--json']
+        for attempt in range(self.retries + 1):
+            try:
+                res = subprocess.run(cmd, cwd=str(ROOT), stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                     timeout=self.timeout, check=True)
+                out = json.loads(res.stdout.decode('utf-8').strip() or '{}')
+                if isinstance(out, dict):
+                    return out
+            except Exception as e:
+                print(f"[local-watch] ai summary attempt {attempt + 1} failed: {e}")
+            if attempt < self.retries:
+                time.sleep(self.backoff * 2 ** attempt)
+        return {}
+
+    def _loop(self):
+        while True:
+            versions = self._take()
+            if not versions:
+                return
+            results = self._run(versions)
+            for version in versions:
+                raw = results.get(version)
+                fields = {k: v for k, v in raw.items() if k in SUMMARY_FIELDS} if isinstance(raw, dict) else {}
+                if fields:
+                    try:
+                        patch_entry(version, fields, only_if=lambda e: e.get('quality') == 'auto')
+                    except LockTimeout as e:
+                        print(f"[local-watch] ai summary for {version} dropped: {e}")
+
+def summary_queue_from_env():
+    if os.environ.get('AI_SUMMARIZE','').lower() not in ('1','true','yes'):
+        return None
+    def num(name, default):
         try:
-            os.system('node scripts/ai-release-summary.mjs --apply --top 1 > /dev/null 2>&1')
-        except Exception:
-            pass
+            return max(0, int(os.environ.get(name, default)))
+        except ValueError:
+            print(f"[local-watch] ignoring invalid {name}={os.environ.get(name)!r}, using {default}")
+            return default
+    cmd = shlex.split(os.environ.get('AI_SUMMARY_CMD', '') or 'node scripts/ai-release-summary.mjs')
+    return SummaryQueue(cmd, timeout=num('AI_SUMMARY_TIMEOUT', 60) or 60, retries=num('AI_SUMMARY_RETRIES', 2))
+
+def apply_release(changes):
+    changes = _filter_changes(changes)
+    if os.environ.get('RELEASE_EXCEPTION','').lower() not in ('1','true','yes'):
+        if in_freeze():
+            print('[local-watch] in freeze window, skipping release bump (set RELEASE_EXCEPTION=true to override)')
+            return
+    try:
+        with ReleaseLock():
+            # Drop paths the pre-commit hook already released since they changed
+            current = (load_json(PKG, {}) or {}).get('version')
+            paths = changes['added'] + changes['modified'] + changes['removed']
+            absorbed = recorded_by_other(read_lease(), 'watcher', current, paths)
+            if absorbed:
+                changes = {k: [x for x in v if x not in absorbed] for k, v in changes.items()}
+                print(f"[local-watch] {len(absorbed)} change(s) already recorded by pre-commit in {current}")
+                if not any(changes.values()):
+                    return
+            nextv = _write_release(changes)
+            write_lease('watcher', nextv, changes['added'] + changes['modified'] + changes['removed'])
+    except LockTimeout as e:
+        print(f"[local-watch] {e}; will retry")
+        return False
+    print(f"[local-watch] release bumped to {nextv}")
+    # Line stats are gathered off the scan loop; risk fields are patched in later
+    fut = ENRICH.submit(enrich_risk, nextv, changes)
+    # Optional AI enhancement of summaries, queued once the risk fields have landed
+    if SUMMARY is not None:
+        fut.add_done_callback(lambda _f, v=nextv: SUMMARY.request(v))
 
 def main():
     ap = argparse.ArgumentParser()
@@ -479,6 +662,9 @@ def main():
     ap.add_argument('--cooldown', type=int, default=int(os.environ.get('RELEASE_COOLDOWN', '5')), help='debounce seconds before writing a release')
     args = ap.parse_args()
 
+    global SUMMARY
+    SUMMARY = summary_queue_from_env()
+
     prev = load_json(STATE, {}) or {}
     if not prev:
         prev = snapshot()
@@ -493,8 +679,7 @@ def main():
             curr = snapshot()
             a, m, r = diff(prev, curr)
             # ignore if only state or release/meta files changed
-            effective = [x for x in (a+m+r) if not any(x.endswith(s) for s in (
-                'release-log.json','package.json','system.meta.json','module.manifest.json', '.local_release_state.json'))]
+            effective = release_paths(a+m+r)
             if effective:
                 pending['added'] += a
                 pending['modified'] += m
@@ -502,13 +687,15 @@ def main():
                 last_change_ts = time.time()
             # debounce window: write only if quiet for cooldown seconds
             if pending['added'] or pending['modified'] or pending['removed']:
-                if time.time() - last_change_ts >= args.cooldown:
-                    apply_release(pending)
+                if time.time() - last_change_ts >= args.cooldown and apply_release(pending) is not False:
                     pending = {'added': [], 'modified': [], 'removed': []}
                     curr = snapshot()  # resnapshot after writing
             write_json(STATE, curr)
             prev = curr
     except KeyboardInterrupt:
+        ENRICH.shutdown(wait=True)
+        if SUMMARY is not None:
+            SUMMARY.stop(wait=5)
         print('\n[local-watch] stopped')
 
 if __name__ == '__main__':
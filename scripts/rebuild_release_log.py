@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Rebuild the release history from git log
+Regenerates modules/ReleaseManagement/release-log.json (plus the monthly
+archives and metrics/release-rollups.json) when the log is lost, corrupted or
+needs the current entry schema:
+ - streams `git log --raw --numstat -z` once (oldest first)
+ - renders one entry per commit with the watcher's build_entry(), scoring
+   risk from the commit's numstat with the release_risk model, fanned out
+   over a process pool
+ - writes the hot log, archives and rollups in one go
+
+Versions already recorded for a commit are reused: `_commit` is the SHA the
+release was cut on, i.e. the commit itself for `ci` entries and its parent for
+pre-commit/watcher entries (chosen by the entry's `sources`). Other commits get the next patch bump, and numbering never goes
+backwards. When the existing history has entries but few of them match a
+commit, the rebuild refuses to run without --force (or --fresh-versions).
+
+Before writing, release-log.json is copied to release-log.json.bak and the
+archives to archive.bak/. Curated data of reused versions (status/state,
+non-auto descriptions and quality, extra fields such as CI's _branch/_range)
+is carried over into the rebuilt entries. If the rebuilt history ends ahead
+of package.json, package.json, system.meta.json and the manifests are synced
+to it so the next bump does not reuse a version.
+
+Run:  python3 scripts/rebuild_release_log.py [--jobs 8] [--dry-run]
+"""
+import argparse, datetime, os, shutil, subprocess, sys
+from concurrent.futures import ProcessPoolExecutor
+
+from local_watch_auto_release import (ROOT, REL, load_json, write_json, bump_patch, build_entry, risk_fields,
+                                      sync_versions, _filter_changes)
+from release_risk import summarize_churn
+from release_archive import ARCHIVE_DIR, split_hot, policy_from_env, archive_entries, iter_archived
+from release_rollups import ROLLUPS, rebuild_rollups
+from release_lock import ReleaseLock
+
+LOG_FORMAT = '%x1e%H%x1f%P%x1f%aI%x1f%an'
+CHUNK_READ = 1 << 16
+BACKUP = REL.with_name(REL.name + '.bak')
+ARCHIVE_BACKUP = ARCHIVE_DIR.with_name(ARCHIVE_DIR.name + '.bak')
+# Below this share of commits matched to recorded versions, require --force
+MIN_MATCH = 0.5
+# Kept from the old entry unless it was auto-generated (quality 'auto')
+CURATED = ('description', 'descriptionPublic', 'quality')
+
+def _commit_from_record(rec: bytes):
+    head, _, body = rec.partition(b'\0')
+    sha, parents, when, author = head.decode('utf-8', 'replace').split('\x1f', 3)
+    tokens = body.lstrip(b'\n').split(b'\0')
+    changes = {'added': [], 'modified': [], 'removed': []}
+    stats = {}
+    i = 0
+    while i < len(tokens):
+        tok = tokens[i].lstrip(b'\n')
+        if not tok:
+            i += 1
+            continue
+        if tok.startswith(b':'):
+            # --raw: ":mode mode sha sha STATUS\0path\0[dst\0]"
+            kind = tok.split()[-1].decode('ascii', 'replace')[:1]
+            if kind in 'RC':
+                src, dst = tokens[i + 1].decode('utf-8', 'replace'), tokens[i + 2].decode('utf-8', 'replace')
+                if kind == 'R':
+                    changes['removed'].append(src)
+                changes['added'].append(dst)
+                i += 3
+                continue
+            path = tokens[i + 1].decode('utf-8', 'replace') if i + 1 < len(tokens) else ''
+            if path:
+                changes[{'A': 'added', 'D': 'removed'}.get(kind, 'modified')].append(path)
+            i += 2
+            continue
+        # --numstat: "added\tdeleted\tpath\0" or "added\tdeleted\t\0src\0dst\0"
+        add, dele, path = (tok.split(b'\t', 2) + [b'', b''])[:3]
+        i += 1
+        if not path:
+            path = tokens[i + 1] if i + 1 < len(tokens) else b''
+            i += 2
+        st = None if add == b'-' or dele == b'-' else (int(add or 0), int(dele or 0))
+        stats[path.decode('utf-8', 'replace')] = st
+    return sha, parents.split(), when, author, changes, stats
+
+def stream_commits(rev: str = 'HEAD'):
+    """Yield (sha, parents, author-date ISO, author, changes, numstat) oldest first from one git process."""
+    proc = subprocess.Popen(['git', 'log', '--reverse', '--raw', '--numstat', '-z', f'--format={LOG_FORMAT}', rev],
+                            cwd=str(ROOT), stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    buf = b''
+    try:
+        while True:
+            chunk = proc.stdout.read(CHUNK_READ)
+            if not chunk:
+                break
+            buf += chunk
+            *records, buf = buf.split(b'\x1e')
+            for rec in records:
+                if rec.strip(b'\0\n'):
+                    yield _commit_from_record(rec)
+        if buf.strip(b'\0\n'):
+            yield _commit_from_record(buf)
+    finally:
+        proc.stdout.close()
+        if proc.wait() != 0:
+            raise SystemExit('[rebuild] git log failed (not a git checkout?)')
+
+def _render_chunk(items):
+    out = []
+    for sha, when, author, version, changes, stats in items:
+        entry = build_entry(changes, version, when=datetime.datetime.fromisoformat(when),
+                            author=author, source='git', commit=sha)
+        # same weighted model the watcher patches in, from the commit's own numstat
+        paths = changes['added'] + changes['modified'] + changes['removed']
+        entry.update(risk_fields(summarize_churn({p: stats.get(p, (0, 0)) for p in paths})))
+        out.append(entry)
+    return out
+
+def version_key(v: str) -> tuple:
+    return tuple(int(x) if x.isdigit() else 0 for x in str(v or '0.0.0').split('.'))
+
+def existing_history() -> list:
+    """Current entries (hot log, then archives) as dicts."""
+    rel = load_json(REL, [])
+    return [e for e in (rel if isinstance(rel, list) else []) + list(iter_archived())
+            if isinstance(e, dict) and e.get('version')]
+
+def known_versions(history: list):
+    """(own, child): highest version recorded per `_commit`.
+
+    CI entries describe the commit they ran on (`own`); pre-commit and watcher
+    entries are cut on the parent of the commit they end up in (`child`).
+    """
+    own, child = {}, {}
+    for e in history:
+        sha = e.get('_commit')
+        if not sha or sha == 'HEAD':
+            continue
+        known = own if 'ci' in (e.get('sources') or []) else child
+        if version_key(e['version']) > version_key(known.get(sha)):
+            known[sha] = e['version']
+    return own, child
+
+def default_base(history: list) -> str:
+    """Version just before the oldest recorded one, so numbering lines up with the old log."""
+    if not history:
+        return '0.0.0'
+    parts = list(min((version_key(e['version']) for e in history)))
+    while len(parts) < 3:
+        parts.append(0)
+    parts[2] = max(0, parts[2] - 1)
+    return '.'.join(map(str, parts))
+
+def plan(rev: str, base: str, known, include_empty: bool):
+    """(items, reused versions): versions strictly increase; a recorded version
+    is only reused when it is ahead of the running one."""
+    own, child = known
+    items, version, matched = [], base, set()
+    for sha, parents, when, author, changes, stats in stream_commits(rev):
+        changes = _filter_changes(changes)
+        if not include_empty and not any(changes.values()):
+            continue
+        nextv = bump_patch(version)
+        recorded = [v for v in (own.get(sha), child.get(parents[0]) if parents else None)
+                    if v and version_key(v) >= version_key(nextv)]
+        if recorded:
+            nextv = max(recorded, key=version_key)
+            matched.add(nextv)
+        version = nextv
+        items.append((sha, when, author, version, changes, stats))
+    return items, matched
+
+def carry_over(history: list, old: list, reused: set) -> int:
+    """Copy curated data from old entries of reused versions; returns entries touched."""
+    by_version = {}
+    for e in old:
+        by_version.setdefault(e['version'], e)
+    touched = 0
+    for e in history:
+        prev = by_version.get(e['version']) if e['version'] in reused else None
+        if not prev:
+            continue
+        for k, v in prev.items():
+            if k not in e:
+                e[k] = v
+        for k in ('status', 'state'):
+            if k in prev:
+                e[k] = prev[k]
+        if prev.get('quality') != 'auto':
+            for k in CURATED:
+                if k in prev:
+                    e[k] = prev[k]
+                elif k == 'quality':
+                    e.pop(k, None)
+        touched += 1
+    return touched
+
+def render(items: list, jobs: int) -> list:
+    if jobs <= 1 or len(items) < 200:
+        return _render_chunk(items)
+    size = max(50, len(items) // (jobs * 4))
+    chunks = [items[i:i + size] for i in range(0, len(items), size)]
+    entries = []
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        for part in pool.map(_render_chunk, chunks):
+            entries.extend(part)
+    return entries
+
+def backup():
+    """Keep the current log and archives next to the originals before they are replaced."""
+    if REL.exists():
+        shutil.copy2(REL, BACKUP)
+    shutil.rmtree(ARCHIVE_BACKUP, ignore_errors=True)
+    if ARCHIVE_DIR.exists():
+        shutil.copytree(ARCHIVE_DIR, ARCHIVE_BACKUP)
+
+def write_history(history: list):
+    """Replace hot log, archives and rollups with a newest-first history."""
+    backup()
+    for p in ARCHIVE_DIR.glob('release-log-*.json.gz'):
+        p.unlink()
+    (ARCHIVE_DIR / 'index.json').unlink(missing_ok=True)
+    hot, cold = split_hot(history, policy_from_env())
+    if cold:
+        archive_entries(cold)
+    write_json(REL, hot)
+    roll = rebuild_rollups(history)
+    roll['updatedAt'] = datetime.datetime.utcnow().isoformat() + 'Z'
+    ROLLUPS.parent.mkdir(parents=True, exist_ok=True)
+    write_json(ROLLUPS, roll)
+    return hot, cold
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--rev', default='HEAD', help='revision to walk (default HEAD)')
+    ap.add_argument('--base', help='version before the first commit (default: just before the oldest recorded version)')
+    ap.add_argument('--jobs', type=int, default=os.cpu_count() or 1, help='render processes')
+    ap.add_argument('--fresh-versions', action='store_true', help='do not reuse versions recorded for known commits')
+    ap.add_argument('--include-empty', action='store_true', help='keep commits that only touch release bookkeeping files')
+    ap.add_argument('--dry-run', action='store_true', help='render but do not write')
+    ap.add_argument('--force', action='store_true', help='write even if few commits match the existing history')
+    args = ap.parse_args()
+
+    old = existing_history()
+    known = ({}, {}) if args.fresh_versions else known_versions(old)
+    base = args.base or default_base(old)
+    items, matched = plan(args.rev, base, known, args.include_empty)
+    if not items:
+        print('[rebuild] no commits to render')
+        return
+    print(f'[rebuild] {len(matched)}/{len(items)} commits matched recorded versions (base {base})')
+    if old and not args.fresh_versions and len(matched) < MIN_MATCH * len(items) and not args.force and not args.dry_run:
+        raise SystemExit(f'[rebuild] refusing: only {len(matched)}/{len(items)} commits match the {len(old)} existing entries; '
+                         'rerun with --force (a backup is kept) or --fresh-versions')
+    history = render(items, args.jobs)
+    history.reverse()  # newest first, like the bump paths
+    kept = carry_over(history, old, matched)
+    if args.dry_run:
+        print(f'[rebuild] {len(history)} entries rendered, {kept} carried over, newest {history[0]["version"]} (dry run)')
+        return
+    newest = history[0]['version']
+    with ReleaseLock(timeout=120):
+        hot, cold = write_history(history)
+        pkg_version = (load_json(ROOT / 'package.json', {}) or {}).get('version')
+        if version_key(newest) > version_key(pkg_version):
+            sync_versions(newest)  # the next bump must continue after the rebuilt history
+    print(f'[rebuild] {len(history)} entries ({kept} carried over): {len(hot)} in {REL.relative_to(ROOT)}, '
+          f'{len(cold)} archived; previous log in {BACKUP.relative_to(ROOT)}')
+    if version_key(newest) > version_key(pkg_version):
+        print(f'[rebuild] package.json {pkg_version} -> {newest} (synced with system.meta.json and manifests)')
+    elif pkg_version and pkg_version != newest:
+        print(f'[rebuild] note: package.json is {pkg_version}, newest rebuilt entry is {newest}', file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Tiered retention for the release history (no Git, no Node required)
+Keeps modules/ReleaseManagement/release-log.json (the hot log read by the UI
+and tooling) bounded and rolls older entries into gzip archives per month:
+
+  modules/ReleaseManagement/archive/release-log-YYYY-MM.json.gz
+  modules/ReleaseManagement/archive/index.json   (version -> month)
+
+Retention is opt-in: with the defaults nothing is archived. Once enabled,
+Node tools that read release-log.json directly (generate-changelog.mjs,
+build-release-pack.mjs, validate-release-log.mjs, the ReleaseManagement UI)
+only see the hot log; use `get` below for older versions.
+
+Policy (env):
+  RELEASE_KEEP          entries kept in the hot log (default 0 = unlimited/off)
+  RELEASE_KEEP_DAYS     also archive entries older than this (default 0 = off)
+  RELEASE_ARCHIVE_BATCH extra entries tolerated before compacting (default 50),
+                        so archives are rewritten in batches, not on every bump
+
+Run:  python3 scripts/release_archive.py compact
+      python3 scripts/release_archive.py get 1.3.42
+"""
+import argparse, gzip, json, os, sys, datetime
+from pathlib import Path
+from release_lock import ReleaseLock
+
+ROOT = Path(__file__).resolve().parents[1]
+REL = ROOT / 'modules' / 'ReleaseManagement' / 'release-log.json'
+ARCHIVE_DIR = ROOT / 'modules' / 'ReleaseManagement' / 'archive'
+INDEX = ARCHIVE_DIR / 'index.json'
+
+def load_json(path: Path, fallback):
+    try:
+        return json.loads(path.read_text(encoding='utf-8'))
+    except Exception:
+        return fallback
+
+def write_json(path: Path, obj):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(obj, ensure_ascii=False, indent=2) + '\n', encoding='utf-8')
+
+def policy_from_env() -> dict:
+    def num(name, default):
+        try:
+            return max(0, int(os.environ.get(name, default)))
+        except ValueError:
+            return default
+    return {
+        'keep': num('RELEASE_KEEP', 0),
+        'days': num('RELEASE_KEEP_DAYS', 0),
+        'batch': num('RELEASE_ARCHIVE_BATCH', 50),
+    }
+
+def month_of(entry: dict) -> str:
+    day = str(entry.get('date') or entry.get('datetime') or '')
+    return day[:7] if len(day) >= 7 and day[4] == '-' else 'undated'
+
+def month_path(month: str) -> Path:
+    return ARCHIVE_DIR / f'release-log-{month}.json.gz'
+
+def read_month(month: str) -> list:
+    try:
+        with gzip.open(month_path(month), 'rt', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return []
+
+def write_month(month: str, entries: list):
+    ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = month_path(month).with_suffix('.tmp')
+    # mtime=0 keeps the gzip bytes stable for identical content
+    with open(tmp, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) as gz:
+        gz.write(json.dumps(entries, ensure_ascii=False, indent=2).encode('utf-8'))
+    os.replace(tmp, month_path(month))
+
+def load_index() -> dict:
+    idx = load_json(INDEX, None)
+    if not isinstance(idx, dict):
+        idx = {}
+    idx.setdefault('versions', {})
+    idx.setdefault('months', {})
+    return idx
+
+def _too_old(entry: dict, days: int, now: datetime.date) -> bool:
+    if not days:
+        return False
+    try:
+        return (now - datetime.date.fromisoformat(str(entry.get('date'))[:10])).days > days
+    except Exception:
+        return False
+
+def needs_compaction(rel: list, policy: dict) -> bool:
+    """Cheap check for the bump paths: only the length and the oldest entry are inspected."""
+    if len(rel) <= 1:
+        return False
+    if policy['keep'] and len(rel) > policy['keep'] + policy['batch']:
+        return True
+    return _too_old(rel[-1], policy['days'], datetime.date.today())
+
+def split_hot(rel: list, policy: dict):
+    """(hot, cold) for a newest-first list; the newest entry always stays hot."""
+    now = datetime.date.today()
+    hot, cold = [], []
+    for i, e in enumerate(rel):
+        keep = i == 0 or ((not policy['keep'] or i < policy['keep']) and not _too_old(e, policy['days'], now))
+        (hot if keep else cold).append(e)
+    return hot, cold
+
+def archive_entries(entries: list) -> int:
+    """Merge entries into their month archives (dedup by version) and update the index."""
+    by_month = {}
+    for e in entries:
+        if isinstance(e, dict):
+            by_month.setdefault(month_of(e), []).append(e)
+    if not by_month:
+        return 0
+    idx = load_index()
+    for month, items in by_month.items():
+        merged = {str(e.get('version')): e for e in read_month(month)}
+        for e in items:
+            merged[str(e.get('version'))] = e
+        ordered = sorted(merged.values(), key=lambda e: (str(e.get('datetime') or e.get('date') or '')), reverse=True)
+        write_month(month, ordered)
+        for e in items:
+            idx['versions'][str(e.get('version'))] = month
+        idx['months'][month] = {'file': month_path(month).name, 'count': len(ordered)}
+    idx['updatedAt'] = datetime.datetime.utcnow().isoformat() + 'Z'
+    write_json(INDEX, idx)
+    return sum(len(v) for v in by_month.values())
+
+def apply_retention(rel: list, policy: dict = None, force: bool = False) -> list:
+    """Return the hot log, archiving anything the policy moves out of it."""
+    policy = policy or policy_from_env()
+    if not force and not needs_compaction(rel, policy):
+        return rel
+    hot, cold = split_hot(rel, policy)
+    if cold:
+        archive_entries(cold)
+    return hot
+
+def lookup(version: str):
+    """Fetch an entry by version from the hot log or the archives."""
+    rel = load_json(REL, [])
+    for e in rel if isinstance(rel, list) else []:
+        if isinstance(e, dict) and e.get('version') == version:
+            return e
+    month = load_index()['versions'].get(version)
+    for e in read_month(month) if month else []:
+        if e.get('version') == version:
+            return e
+    return None
+
+def iter_archived():
+    """All archived entries, newest month first ('undated' last)."""
+    months = load_index()['months']
+    for month in sorted((m for m in months if m != 'undated'), reverse=True) + [m for m in months if m == 'undated']:
+        yield from read_month(month)
+
+def main():
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest='cmd', required=True)
+    sub.add_parser('compact', help='apply the retention policy to the hot log now')
+    g = sub.add_parser('get', help='print a release entry by version')
+    g.add_argument('version')
+    args = ap.parse_args()
+
+    if args.cmd == 'get':
+        e = lookup(args.version)
+        if e is None:
+            print(f'[archive] version {args.version} not found', file=sys.stderr)
+            sys.exit(1)
+        print(json.dumps(e, ensure_ascii=False, indent=2))
+        return
+    with ReleaseLock():
+        rel = load_json(REL, []) or []
+        hot = apply_retention(rel, force=True)
+        if len(hot) != len(rel):
+            write_json(REL, hot)
+    print(f'[archive] hot log: {len(hot)} entries, archived {len(rel) - len(hot)}')
+
+if __name__ == '__main__':
+    main()
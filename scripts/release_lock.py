@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Lock-and-lease protocol shared by the pre-commit hook and the local watcher.
+
+Both actors bump package.json, system.meta.json and release-log.json. Every
+release happens under an advisory fcntl lock on .release.lock, and the actor
+that performed it updates the lease in .release_lease.json:
+
+  {"actor": "watcher", "version": "1.3.42", "head": "<git HEAD>", "at": <epoch>, "pid": 123,
+   "released": {"watcher": {"<path>": <epoch>, ...}, "pre-commit": {...}}}
+
+`released` accumulates every path each actor released since `head` (several
+watcher releases per commit are normal) and starts over once HEAD moves.
+Before bumping, an actor reads the lease. Changed paths that the other actor
+already released (and that were not modified after that release) are absorbed
+instead of producing a second release for the same change. The lease only
+counts while its version is still the current one.
+Without fcntl (Windows) only in-process threads are serialized.
+
+The Node hook (auto-release-log.mjs) takes part through the `run` wrapper,
+which holds the lock, skips the command when the watcher already recorded
+every staged path, and writes the lease if the command bumped the version:
+
+  python3 scripts/release_lock.py run pre-commit -- node scripts/auto-release-log.mjs
+"""
+import argparse, json, os, subprocess, sys, threading, time
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+ROOT = Path(__file__).resolve().parents[1]
+LOCK = ROOT / '.release.lock'
+LEASE = ROOT / '.release_lease.json'
+
+# Files the bump itself writes (and the hooks stage); never part of what a release records
+BOOKKEEPING = ('.local_release_state.json', 'release-log.json', 'release-log.json.bak', 'package.json',
+               'system.meta.json', 'module.manifest.json', 'metrics/release-rollups.json',
+               '.release.lock', '.release_lease.json', '.release_lease.tmp')
+BOOKKEEPING_DIRS = ('modules/ReleaseManagement/archive/', 'modules/ReleaseManagement/archive.bak/')
+
+_THREAD_LOCK = threading.Lock()
+
+class LockTimeout(Exception):
+    pass
+
+class ReleaseLock:
+    """Exclusive release lock: in-process mutex plus an fcntl lock on LOCK."""
+
+    def __init__(self, timeout: float = 30.0, path: Path = LOCK):
+        self.timeout = timeout
+        self.path = path
+        self._fd = None
+
+    def acquire(self):
+        deadline = time.monotonic() + self.timeout
+        if not _THREAD_LOCK.acquire(timeout=self.timeout):
+            raise LockTimeout(f'release lock busy for {self.timeout}s')
+        if fcntl is None:
+            return self
+        try:
+            fd = os.open(str(self.path), os.O_RDWR | os.O_CREAT, 0o644)
+            while True:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    if time.monotonic() >= deadline:
+                        os.close(fd)
+                        raise LockTimeout(f'{self.path.name} held by another process for {self.timeout}s')
+                    time.sleep(0.05)
+            self._fd = fd
+        except BaseException:
+            _THREAD_LOCK.release()
+            raise
+        return self
+
+    def release(self):
+        if self._fd is not None:
+            try:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            finally:
+                os.close(self._fd)
+                self._fd = None
+        _THREAD_LOCK.release()
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, *exc):
+        self.release()
+        return False
+
+def read_lease(path: Path = LEASE) -> dict:
+    try:
+        lease = json.loads(path.read_text(encoding='utf-8'))
+        return lease if isinstance(lease, dict) else {}
+    except Exception:
+        return {}
+
+def git_head(root: Path = ROOT) -> str:
+    """SHA the release is cut on (same convention as auto-release-log.mjs); 'HEAD' without Git."""
+    try:
+        out = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=str(root), stdout=subprocess.PIPE,
+                             stderr=subprocess.DEVNULL, check=True).stdout.decode().strip()
+        return out or 'HEAD'
+    except Exception:
+        return 'HEAD'
+
+def write_lease(actor: str, version: str, files, path: Path = LEASE, root: Path = ROOT) -> dict:
+    """Record the release just performed (call while holding the lock)."""
+    prev = read_lease(path)
+    head = git_head(root)
+    released = prev.get('released') if prev.get('head') == head else None
+    released = {k: dict(v) for k, v in released.items() if isinstance(v, dict)} if isinstance(released, dict) else {}
+    now = time.time()
+    mine = released.setdefault(actor, {})
+    for f in files:
+        mine[f] = now
+    lease = {'actor': actor, 'version': version, 'head': head, 'at': now, 'pid': os.getpid(), 'released': released}
+    tmp = path.with_suffix('.tmp')
+    tmp.write_text(json.dumps(lease, indent=2, sort_keys=True) + '\n', encoding='utf-8')
+    os.replace(tmp, path)
+    return lease
+
+def recorded_by_other(lease: dict, actor: str, current_version: str, paths, root: Path = ROOT) -> set:
+    """Paths already released by the other actor and untouched since.
+
+    The lease only counts while its version is still the current one, i.e.
+    nobody has bumped outside the protocol after it.
+    """
+    if not lease or lease.get('version') != current_version:
+        return set()
+    released = lease.get('released') if isinstance(lease.get('released'), dict) else {}
+    out = set()
+    for other, files in released.items():
+        if other == actor or not isinstance(files, dict):
+            continue
+        for p in paths:
+            if p not in files:
+                continue
+            try:
+                if (root / p).stat().st_mtime > float(files[p] or 0):
+                    continue  # edited again after the other actor's release
+            except FileNotFoundError:
+                pass  # removal: nothing newer to compare
+            out.add(p)
+    return out
+
+def is_bookkeeping(path: str) -> bool:
+    return path.endswith(BOOKKEEPING) or path.startswith(BOOKKEEPING_DIRS)
+
+def release_paths(files) -> list:
+    """Changed paths minus the bump's own bookkeeping files."""
+    return [f for f in files if f and not is_bookkeeping(f)]
+
+def _staged(root: Path) -> list:
+    try:
+        out = subprocess.run(['git', 'diff', '--cached', '--name-only'], cwd=str(root),
+                             stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True).stdout
+    except Exception:
+        return []
+    return out.decode('utf-8', 'replace').splitlines()
+
+def _version(root: Path) -> str:
+    try:
+        return json.loads((root / 'package.json').read_text(encoding='utf-8')).get('version') or '0.0.0'
+    except Exception:
+        return '0.0.0'
+
+def run_locked(actor: str, cmd: list, timeout: float = 30.0, root: Path = ROOT) -> int:
+    """Run a bump command under the lock with the lease protocol applied around it."""
+    try:
+        lock = ReleaseLock(timeout).acquire()
+    except LockTimeout as e:
+        print(f'[{actor}] {e}; skipping release bump')
+        return 0
+    try:
+        before = _version(root)
+        paths = release_paths(_staged(root))
+        if paths and recorded_by_other(read_lease(), actor, before, paths, root) == set(paths):
+            print(f'[{actor}] changes already recorded by the watcher in {before}; no new bump')
+            return 0
+        code = subprocess.call(cmd, cwd=str(root))
+        after = _version(root)
+        if after != before:
+            write_lease(actor, after, paths)
+        return code
+    finally:
+        lock.release()
+
+def main():
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest='cmd', required=True)
+    r = sub.add_parser('run', help='run a bump command under the release lock and lease')
+    r.add_argument('actor')
+    r.add_argument('--timeout', type=float, default=30.0)
+    r.add_argument('command', nargs=argparse.REMAINDER)
+    args = ap.parse_args()
+    command = args.command[1:] if args.command[:1] == ['--'] else args.command
+    if not command:
+        ap.error('run: missing command')
+    sys.exit(run_locked(args.actor, command, args.timeout))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Line-level churn and weighted risk scoring for release entries.
+
+Churn is measured from the previous release of each file where possible: the
+caller keeps a `baseline` dict (path -> line hashes captured when that file
+was last released) and those files are diffed in-process. Files without a
+baseline (first change since the watcher started) go through a single batched
+`git diff --numstat -z HEAD`; files git does not know about (untracked, or no
+Git at all) fall back to counting their lines.
+
+Limitation: for a file's first change after a commit, HEAD already contains
+the change, so git reports 0/0 and only the file spread counts towards risk.
+
+Risk follows risk-matrix.yml: impact (1-3, from the touched categories) times
+likelihood (1-3, from lines changed and file spread), with the matrix
+thresholds low 1-2, medium 3-4, high 5-9.
+"""
+import difflib, subprocess
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Impact level per category (risk-matrix.yml: low 1, medium 2, high 3)
+CATEGORY_IMPACT = {
+    'html_csp': 3,
+    'service_worker': 3,
+    'loader': 2,
+    'state': 2,
+    'release_mgmt': 2,
+    'config': 2,
+}
+# Each touched file counts as this many changed lines for likelihood
+FILE_WEIGHT = 10
+# Weighted churn upper bounds for likelihood unlikely(1) / possible(2); above is likely(3)
+LIKELIHOOD_LIMITS = (150, 1500)
+# Cap per-file fallback line counting so huge assets do not stall the worker
+MAX_COUNT_BYTES = 4 * 1024 * 1024
+# Above this many paths, diff the whole tree instead of passing a pathspec
+MAX_PATHSPEC = 500
+
+def _parse_numstat_z(raw: bytes) -> dict:
+    out = {}
+    parts = raw.split(b'\0')
+    i = 0
+    while i < len(parts):
+        rec = parts[i]
+        i += 1
+        if not rec:
+            continue
+        fields = rec.split(b'\t', 2)
+        if len(fields) < 3:
+            continue
+        add, dele, path = fields
+        if not path:
+            # rename/copy: "add\tdel\t\0src\0dst\0"
+            if i + 1 >= len(parts):
+                break
+            path = parts[i + 1]
+            i += 2
+        name = path.decode('utf-8', 'replace')
+        if add == b'-' or dele == b'-':
+            out[name] = None  # binary
+        else:
+            out[name] = (int(add), int(dele))
+    return out
+
+def numstat(paths, cwd: Path = ROOT) -> dict:
+    """{path: (added, deleted) | None for binary} from one git call; {} without Git."""
+    cmd = ['git', 'diff', '--numstat', '-z', 'HEAD']
+    paths = list(paths)
+    if paths and len(paths) <= MAX_PATHSPEC:
+        cmd += ['--'] + paths
+    try:
+        raw = subprocess.run(cmd, cwd=str(cwd), stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True).stdout
+    except Exception:
+        return {}
+    stats = _parse_numstat_z(raw)
+    if paths and len(paths) > MAX_PATHSPEC:
+        wanted = set(paths)
+        stats = {k: v for k, v in stats.items() if k in wanted}
+    return stats
+
+def line_count(path: Path):
+    """Line count of a file on disk; None when binary, too large or unreadable."""
+    try:
+        if path.stat().st_size > MAX_COUNT_BYTES:
+            return None
+        data = path.read_bytes()
+    except Exception:
+        return None
+    if b'\0' in data[:8192]:
+        return None
+    return data.count(b'\n') + (1 if data and not data.endswith(b'\n') else 0)
+
+def line_hashes(path: Path):
+    """Per-line hashes of a file (baseline snapshot); None when binary/too large/unreadable."""
+    try:
+        if path.stat().st_size > MAX_COUNT_BYTES:
+            return None
+        data = path.read_bytes()
+    except Exception:
+        return None
+    if b'\0' in data[:8192]:
+        return None
+    return [hash(line) for line in data.splitlines()]
+
+def diff_counts(old: list, new: list) -> tuple:
+    """(added, deleted) lines between two line-hash lists."""
+    added = deleted = 0
+    for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, old, new, autojunk=False).get_opcodes():
+        if tag in ('replace', 'delete'):
+            deleted += i2 - i1
+        if tag in ('replace', 'insert'):
+            added += j2 - j1
+    return added, deleted
+
+def collect_churn(changes: dict, cwd: Path = ROOT, baseline: dict = None) -> dict:
+    """Per-file and total churn for {'added': [...], 'modified': [...], 'removed': [...]}.
+
+    With `baseline`, files released before are diffed against their content at
+    that release, and the baseline is advanced to the current content.
+    """
+    added = list(changes.get('added', []))
+    modified = list(changes.get('modified', []))
+    removed = list(changes.get('removed', []))
+    paths = added + modified + removed
+    known = {}
+    if baseline is not None:
+        for p in paths:
+            old = baseline.get(p)
+            if old is None:
+                continue
+            new = [] if p in removed else line_hashes(cwd / p)
+            if new is not None:
+                known[p] = diff_counts(old, new)
+    stats = numstat([p for p in paths if p not in known], cwd=cwd)
+    per_file = {}
+    for p in paths:
+        if p in known:
+            st = known[p]
+        elif p in stats:
+            st = stats[p]
+        elif p in added:
+            n = line_count(cwd / p)
+            st = None if n is None else (n, 0)
+        else:
+            st = (0, 0)  # unchanged for git, or no Git: file spread only
+        per_file[p] = st
+    if baseline is not None:
+        for p in paths:
+            snap = None if p in removed else line_hashes(cwd / p)
+            if snap is None:
+                baseline.pop(p, None)
+            else:
+                baseline[p] = snap
+    return summarize_churn(per_file)
+
+def summarize_churn(per_file: dict) -> dict:
+    """Totals for {path: (added, deleted) | None for binary}."""
+    binary = sum(1 for st in per_file.values() if st is None)
+    per_file = {p: st or (0, 0) for p, st in per_file.items()}
+    return {
+        'added': sum(a for a, _ in per_file.values()),
+        'deleted': sum(d for _, d in per_file.values()),
+        'files': len(per_file),
+        'binary': binary,
+        'perFile': per_file,
+    }
+
+def weighted_categories(per_file: dict, classify) -> list:
+    """Top 3 categories ranked by changed lines (ties broken by file count)."""
+    lines, files = {}, {}
+    for p, (a, d) in per_file.items():
+        c = classify(p)
+        lines[c] = lines.get(c, 0) + a + d
+        files[c] = files.get(c, 0) + 1
+    ranked = sorted(lines, key=lambda c: (lines[c], files[c]), reverse=True)
+    return ranked[:3]
+
+def impact_level(cats) -> int:
+    return max([CATEGORY_IMPACT.get(c, 1) for c in cats] or [1])
+
+def likelihood_level(churn: dict) -> int:
+    weighted = churn.get('added', 0) + churn.get('deleted', 0) + FILE_WEIGHT * churn.get('files', 0)
+    if weighted <= LIKELIHOOD_LIMITS[0]:
+        return 1
+    if weighted <= LIKELIHOOD_LIMITS[1]:
+        return 2
+    return 3
+
+def score_risk(churn: dict, cats) -> tuple:
+    """(risk level, score) using the risk-matrix.yml impact x likelihood grid."""
+    score = impact_level(cats) * likelihood_level(churn)
+    if score >= 5:
+        return 'high', score
+    if score >= 3:
+        return 'medium', score
+    return 'low', score
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Incremental release analytics rollups (no Git, no Node required)
+Keeps metrics/release-rollups.json in sync with the release log so dashboards
+and DORA-style reports can read precomputed aggregates instead of parsing the
+whole history:
+ - releases per day / ISO week
+ - counts per module and category
+ - impact / risk distribution
+ - inter-release intervals (count, sum, min, max, buckets)
+
+The bump paths call update_rollups() right after prepending an entry. If the
+rollups file is missing or out of step with the log it is rebuilt once from
+the hot log plus the monthly archives (see release_archive.py).
+
+Run:  python3 scripts/release_rollups.py --rebuild
+"""
+import argparse, json, datetime
+from pathlib import Path
+from release_archive import iter_archived
+
+ROOT = Path(__file__).resolve().parents[1]
+REL = ROOT / 'modules' / 'ReleaseManagement' / 'release-log.json'
+ROLLUPS = ROOT / 'metrics' / 'release-rollups.json'
+
+SCHEMA = 1
+INTERVAL_BUCKETS = [('<1h', 3600), ('<1d', 86400), ('<1w', 7 * 86400), ('>=1w', None)]
+
+def load_json(path: Path, fallback):
+    try:
+        return json.loads(path.read_text(encoding='utf-8'))
+    except Exception:
+        return fallback
+
+def write_json(path: Path, obj):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(obj, ensure_ascii=False, indent=2) + '\n', encoding='utf-8')
+
+def empty_rollups() -> dict:
+    return {
+        'schema': SCHEMA,
+        'updatedAt': None,
+        'total': 0,
+        'firstVersion': None,
+        'lastVersion': None,
+        'lastDatetime': None,
+        'perDay': {},
+        'perWeek': {},
+        'modules': {},
+        'categories': {},
+        'impact': {},
+        'risk': {},
+        'intervals': {
+            'count': 0,
+            'sumSeconds': 0,
+            'minSeconds': None,
+            'maxSeconds': None,
+            'buckets': {k: 0 for k, _ in INTERVAL_BUCKETS}
+        }
+    }
+
+def parse_when(entry: dict):
+    """Best-effort UTC datetime for an entry (datetime, else date + time)."""
+    raw = entry.get('datetime')
+    if raw:
+        try:
+            dt = datetime.datetime.fromisoformat(str(raw).replace('Z', '+00:00'))
+            if dt.tzinfo is None:
+                dt = dt.replace(tzinfo=datetime.timezone.utc)
+            return dt.astimezone(datetime.timezone.utc)
+        except Exception:
+            pass
+    day = entry.get('date')
+    if day:
+        try:
+            dt = datetime.datetime.fromisoformat(f"{day}T{entry.get('time') or '00:00'}")
+            return dt.replace(tzinfo=datetime.timezone.utc)
+        except Exception:
+            pass
+    return None
+
+def _bump(bucket: dict, key, n: int = 1):
+    if not key:
+        return
+    bucket[key] = bucket.get(key, 0) + n
+    if bucket[key] <= 0:
+        del bucket[key]
+
+def _count_entry(roll: dict, entry: dict, n: int):
+    day = entry.get('date')
+    if not day:
+        when = parse_when(entry)
+        day = when.date().isoformat() if when else None
+    _bump(roll['perDay'], day, n)
+    if day:
+        try:
+            y, w, _ = datetime.date.fromisoformat(day).isocalendar()
+            _bump(roll['perWeek'], f'{y}-W{w:02d}', n)
+        except Exception:
+            pass
+    for m in entry.get('modules') or []:
+        _bump(roll['modules'], m, n)
+    for c in entry.get('categories') or []:
+        _bump(roll['categories'], c, n)
+    _bump(roll['impact'], entry.get('impact') or 'unknown', n)
+    _bump(roll['risk'], entry.get('risk') or 'unknown', n)
+
+def _record_interval(roll: dict, seconds: float):
+    iv = roll['intervals']
+    seconds = max(0, int(seconds))
+    iv['count'] += 1
+    iv['sumSeconds'] += seconds
+    iv['minSeconds'] = seconds if iv['minSeconds'] is None else min(iv['minSeconds'], seconds)
+    iv['maxSeconds'] = seconds if iv['maxSeconds'] is None else max(iv['maxSeconds'], seconds)
+    for name, limit in INTERVAL_BUCKETS:
+        if limit is None or seconds < limit:
+            iv['buckets'][name] = iv['buckets'].get(name, 0) + 1
+            break
+
+def add_entry(roll: dict, entry: dict) -> dict:
+    """Fold one new (newest) entry into the rollups in O(1)."""
+    _count_entry(roll, entry, 1)
+    when = parse_when(entry)
+    if when is not None and roll.get('lastDatetime'):
+        try:
+            prev = datetime.datetime.fromisoformat(roll['lastDatetime'])
+            _record_interval(roll, (when - prev).total_seconds())
+        except Exception:
+            pass
+    if when is not None:
+        roll['lastDatetime'] = when.isoformat()
+    roll['total'] += 1
+    roll['firstVersion'] = roll.get('firstVersion') or entry.get('version')
+    roll['lastVersion'] = entry.get('version')
+    return roll
+
+def retally(roll: dict, before: dict, after: dict) -> dict:
+    """Move an already counted entry from its old fields to its patched fields."""
+    _count_entry(roll, before, -1)
+    _count_entry(roll, after, 1)
+    return roll
+
+def rebuild_rollups(rel: list) -> dict:
+    """Recompute rollups from a newest-first release list."""
+    roll = empty_rollups()
+    for entry in reversed(rel or []):
+        if isinstance(entry, dict):
+            add_entry(roll, entry)
+    return roll
+
+def _stamp(roll: dict) -> dict:
+    roll['updatedAt'] = datetime.datetime.utcnow().isoformat() + 'Z'
+    return roll
+
+def full_history(rel: list) -> list:
+    """Hot log followed by archived entries not already in it (newest first)."""
+    seen = {e.get('version') for e in rel if isinstance(e, dict)}
+    return list(rel) + [e for e in iter_archived() if e.get('version') not in seen]
+
+def update_rollups(rel: list, path: Path = ROLLUPS) -> dict:
+    """Fold rel[0] into the rollups file; rebuild if it does not match rel[1]."""
+    roll = load_json(path, None)
+    prev_version = rel[1].get('version') if len(rel) > 1 else None
+    if not isinstance(roll, dict) or roll.get('schema') != SCHEMA or roll.get('lastVersion') != prev_version:
+        roll = rebuild_rollups(full_history(rel))
+    else:
+        add_entry(roll, rel[0])
+    write_json(path, _stamp(roll))
+    return roll
+
+def patch_rollups(before: dict, after: dict, path: Path = ROLLUPS):
+    """Apply an in-place entry patch (e.g. late risk/impact) to the rollups file."""
+    roll = load_json(path, None)
+    if not isinstance(roll, dict) or roll.get('schema') != SCHEMA:
+        return None
+    write_json(path, _stamp(retally(roll, before, after)))
+    return roll
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--rebuild', action='store_true', help='recompute rollups from the full release log')
+    args = ap.parse_args()
+    roll = load_json(ROLLUPS, None)
+    if args.rebuild or not isinstance(roll, dict):
+        roll = _stamp(rebuild_rollups(full_history(load_json(REL, []) or [])))
+        write_json(ROLLUPS, roll)
+    print(f"[rollups] {roll['total']} releases, last {roll['lastVersion']} -> {ROLLUPS.relative_to(ROOT)}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""SummaryQueue (scripts/local_watch_auto_release.py) against scripts/ai_summary_stub.py.
+
+Run: python3 -m unittest discover -s tests -p 'test_*.py'
+"""
+import json, os, shutil, sys, tempfile, threading, unittest
+from pathlib import Path
+from unittest import mock
+
+SCRIPTS = Path(__file__).resolve().parents[1] / 'scripts'
+sys.path.insert(0, str(SCRIPTS))
+
+import local_watch_auto_release as w
+from release_lock import ReleaseLock
+
+STUB = [sys.executable, str(SCRIPTS / 'ai_summary_stub.py')]
+VERSIONS = ['0.0.1', '0.0.2', '0.0.3', '0.0.4']
+
+class SummaryQueueTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp(prefix='summary-queue-'))
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+        self.calls = self.tmp / 'calls'
+        rel = self.tmp / 'release-log.json'
+        w.write_json(rel, [{'version': v, 'quality': 'auto', 'descriptionPublic': {}} for v in reversed(VERSIONS)])
+        lock = self.tmp / '.release.lock'
+        self.patched = []
+        self.done = threading.Event()
+        real_patch = w.patch_entry
+
+        def patch_entry(version, fields, only_if=None):
+            ok = real_patch(version, fields, only_if)
+            self.patched.append(version)
+            if len(self.patched) == len(VERSIONS):
+                self.done.set()
+            return ok
+
+        for target, value in (('REL', rel), ('patch_rollups', lambda *a, **k: None),
+                              ('ReleaseLock', lambda timeout=30.0: ReleaseLock(timeout, lock)),
+                              ('patch_entry', patch_entry)):
+            p = mock.patch.object(w, target, value)
+            p.start()
+            self.addCleanup(p.stop)
+
+    def stub_env(self, **env):
+        p = mock.patch.dict(os.environ, {'AI_STUB_STATE': str(self.calls), **env})
+        p.start()
+        self.addCleanup(p.stop)
+
+    def queue(self, **kw):
+        q = w.SummaryQueue(STUB, **kw)
+        self.addCleanup(q.stop, 5)
+        return q
+
+    def log(self):
+        return {e['version']: e for e in w.load_json(w.REL, [])}
+
+    def test_coalesces_retries_and_filters_fields(self):
+        self.stub_env(AI_STUB_FAILS='1', AI_STUB_EXTRA='1')
+        q = self.queue(coalesce=0.3, retries=1, backoff=0)
+        for v in VERSIONS:
+            q.request(v)
+        self.assertTrue(self.done.wait(10), 'summaries were not applied')
+        self.assertEqual(self.calls.read_text(), '2')  # one failed run, one retry covering every version
+        log = self.log()
+        self.assertEqual(set(log), set(VERSIONS))  # the forbidden "version" field was dropped
+        for v in VERSIONS:
+            self.assertEqual(log[v]['quality'], 'ai')
+            self.assertEqual(log[v]['descriptionPublic'], {'en': f'Stub summary for {v}.'})
+
+    def test_skips_entries_no_longer_auto(self):
+        log = self.log()
+        log['0.0.2']['quality'] = 'manual'
+        w.write_json(w.REL, list(log.values()))
+        self.stub_env()
+        q = self.queue(coalesce=0.1, retries=0)
+        for v in VERSIONS:
+            q.request(v)
+        self.assertTrue(self.done.wait(10))
+        self.assertEqual(self.log()['0.0.2']['quality'], 'manual')
+
+    def test_timeout_gives_up_without_results(self):
+        self.stub_env(AI_STUB_SLEEP='5')
+        q = self.queue(timeout=0.3, retries=0)
+        q.stop(5)
+        self.assertEqual(q._run(VERSIONS), {})
+        self.assertFalse(self.calls.exists())  # killed before answering
+        self.assertTrue(all(e['quality'] == 'auto' for e in self.log().values()))
+
+    def test_invalid_env_falls_back_to_defaults(self):
+        with mock.patch.dict(os.environ, {'AI_SUMMARIZE': '1', 'AI_SUMMARY_TIMEOUT': 'soon', 'AI_SUMMARY_RETRIES': 'x'}):
+            q = w.summary_queue_from_env()
+        q.stop(5)
+        self.assertEqual((q.timeout, q.retries), (60, 2))
+
+if __name__ == '__main__':
+    unittest.main()